@@ -1,14 +1,38 @@
 '''
 Basic CSV Reading and Writing API using Flask and Polars
 '''
+import atexit
+from collections import defaultdict
 import logging
-from functools import reduce
-import operator
-from flask import Flask, jsonify, request
+from functools import lru_cache
+import gzip
+import threading
+import time
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
+import orjson
 import polars as pl
 
 
+class OrjsonProvider(DefaultJSONProvider):
+    '''
+        JSON provider that encodes responses with orjson instead of the stdlib json module.
+    '''
+    options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.options),
+            mimetype="application/json"
+        )
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 
 # Configure loading of CSV files
@@ -20,28 +44,159 @@ logging.basicConfig(filename='output.log',
 
 CSV_PATH = "friends_data.csv"
 
-#Load CSV files from Polars with lazy loading
+# Seconds to wait after a mutation before writing the CSV, so bursts share one write
+FLUSH_DELAY = 0.25
+
+# Deletes leave items split into chunks; rechunk once it holds more than this many
+MAX_CHUNKS = 32
+
+# Largest page size whose rendered body is cached; bigger pages are rendered per request
+MAX_CACHED_LIMIT = 100
+
+
+#Load CSV files with Polars
 def load_csv(file_path : str, attempts = 5) -> pl.DataFrame | None:
     '''
-        Load CSV file using Polars with lazy loading for potentially larger files.
+        Load CSV file eagerly using Polars, retrying on failure.
         Args:
             file_path (str): Path to the CSV file.
+            attempts (int): Number of times to try loading before giving up.
 
         Returns:
             pl.DataFrame: Loaded DataFrame or None if an error occurs.
     '''
-    try:
-        for attempt in range(attempts):
-            logging.info("Attempt %d to load CSV file: %s", attempt + 1, file_path)
-            df = pl.scan_csv(file_path).collect()
+    for attempt in range(attempts):
+        logging.info("Attempt %d to load CSV file: %s", attempt + 1, file_path)
+        try:
+            df = pl.read_csv(file_path)
             logging.info("CSV file %s loaded successfully.", file_path)
             return df
-    except (FileNotFoundError, pl.exceptions.NoDataError, pl.exceptions.ComputeError) as e:
-        logging.error("Error loading CSV file %s: %s", file_path, e, exc_info=True)
-        return None
+        except (FileNotFoundError, pl.exceptions.NoDataError, pl.exceptions.ComputeError) as e:
+            logging.warning("Attempt %d to load CSV file %s failed: %s", attempt + 1, file_path, e)
+            # Exponential backoff before the next attempt
+            if attempt + 1 < attempts:
+                time.sleep(0.05 * 2 ** attempt)
+
+    logging.error("Error loading CSV file %s after %d attempts.", file_path, attempts)
+    return None
 
 # Sample data
 items = load_csv(CSV_PATH)
+if items is None:
+    logging.critical("Cannot start without data from %s.", CSV_PATH)
+    raise SystemExit(f"Failed to load {CSV_PATH}; see output.log for details.")
+
+# Ensure 'id' column is int for comparison
+if items["id"].dtype != pl.Int64:
+    items = items.with_columns(pl.col("id").cast(pl.Int64))
+
+# Bumped on every mutation of items so cached pages are never served stale
+_items_version = 0
+
+# Full JSON dump of items, raw and gzip-compressed, for the unpaginated listing
+_cache = {"version": -1, "body": b"", "gz": b""}
+
+# Serializes rebuilds of _cache, separately from _items_lock
+_dump_lock = threading.Lock()
+
+
+def build_id_index(df: pl.DataFrame) -> dict[int, int]:
+    '''
+        Map each character id to its row index for O(1) lookups.
+        Args:
+            df (pl.DataFrame): DataFrame with an 'id' column.
+
+        Returns:
+            dict[int, int]: Mapping of id to row index.
+    '''
+    return {int(v): i for i, v in enumerate(df["id"].to_list())}
+
+_id_index = build_id_index(items)
+
+# Guards items and its indices so readers, mutators and the background CSV flush
+# always see a consistent (items, _id_index, _items_version) state
+_items_lock = threading.RLock()
+
+
+def build_name_index(df: pl.DataFrame, column: str) -> dict[str, list[int]]:
+    '''
+        Map each lowercased value of a name column to the row indices holding it.
+        Args:
+            df (pl.DataFrame): DataFrame containing the column.
+            column (str): Name column to index.
+
+        Returns:
+            dict[str, list[int]]: Mapping of lowercased name to row indices.
+    '''
+    index = defaultdict(list)
+    for i, name in enumerate(df[column].str.to_lowercase().to_list()):
+        if name is not None:
+            index[name].append(i)
+    return dict(index)
+
+# Name indices for search, built on first use and dropped whenever names change.
+# Writes stay O(1), but the first search after a name change or delete pays the
+# O(N) rebuild while holding _items_lock.
+_fn_idx: dict[str, list[int]] | None = None
+_ln_idx: dict[str, list[int]] | None = None
+
+
+def name_indices() -> tuple[dict[str, list[int]], dict[str, list[int]]]:
+    '''
+        Return the first and last name indices, building any that are missing.
+
+        Returns:
+            tuple: First name index and last name index.
+    '''
+    global _fn_idx, _ln_idx
+
+    with _items_lock:
+        if _fn_idx is None:
+            _fn_idx = build_name_index(items, "first_name")
+        if _ln_idx is None:
+            _ln_idx = build_name_index(items, "last_name")
+        return _fn_idx, _ln_idx
+
+# Set when items has changes that are not yet written to CSV_PATH
+_dirty = threading.Event()
+
+# Held while writing the CSV, separately from _items_lock so readers are not blocked
+_flush_lock = threading.Lock()
+
+
+def flush_csv() -> None:
+    '''
+        Write items back to the CSV file if there are unsaved changes.
+    '''
+    # Serialize writers so an older snapshot can never overwrite a newer one
+    with _flush_lock:
+        # Hold the items lock only long enough to snapshot; update_character mutates items in place
+        with _items_lock:
+            if not _dirty.is_set():
+                return
+            _dirty.clear()
+            snapshot = items.clone()
+
+        try:
+            snapshot.write_csv(CSV_PATH)
+            logging.info("CSV file %s flushed successfully.", CSV_PATH)
+        except (OSError, pl.exceptions.ComputeError) as e:
+            _dirty.set()
+            logging.error("Error writing CSV file %s: %s", CSV_PATH, e, exc_info=True)
+
+
+def _flush_worker() -> None:
+    '''
+        Background loop that batches pending changes into a single CSV write.
+    '''
+    while True:
+        _dirty.wait()
+        time.sleep(FLUSH_DELAY)
+        flush_csv()
+
+
+threading.Thread(target=_flush_worker, name="csv-flush", daemon=True).start()
+atexit.register(flush_csv)
 
 # Show Home page
 @app.route("/", methods=["GET"])
@@ -52,7 +207,7 @@ def home_page():
         Returns:
             JSON response with a welcome message.
     '''
-    return jsonify("Basic CSV Reading and Writing API using Flask")
+    return app.json.response("Basic CSV Reading and Writing API using Flask")
 
 
 # Get All Items
@@ -62,9 +217,10 @@ def get_characters():
     Get paginated list of characters from the CSV file.
     Query Params:
         page (int): Page number (default=1)
-        limit (int): Number of items per page (default=10)
+        limit (int): Number of items per page (default=10, 0 returns every record)
     Returns:
-        JSON list of character records with pagination metadata
+        JSON list of character records with pagination metadata. With limit=0 the
+        response is a single page (page=1, limit=0, total_pages=1) holding every record.
     """
     
     # Default pagination values
@@ -76,7 +232,77 @@ def get_characters():
     if json_data:
         page = int(json_data.get("page", page))
         limit = int(json_data.get("limit", limit))
-    
+
+    if page < 1 or limit < 0:
+        return app.json.response({"error": "'page' must be at least 1 and 'limit' at least 0."}), 400
+
+    # Pagination disabled: serve the precomputed full dump
+    if limit == 0:
+        cache = _full_dump()
+        # Honour q-values so "gzip;q=0" opts out of compression
+        if request.accept_encodings["gzip"] > 0:
+            return Response(cache["gz"], mimetype="application/json",
+                            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+        return Response(cache["body"], mimetype="application/json", headers={"Vary": "Accept-Encoding"})
+
+    # Only cache small pages so large limits cannot fill the cache with copies of the table
+    render = _render_page if limit <= MAX_CACHED_LIMIT else _render_page.__wrapped__
+
+    # Read the version and render under the lock so a page always matches its version
+    with _items_lock:
+        body = render(_items_version, page, limit)
+
+    return Response(body, mimetype="application/json")
+
+
+def _full_dump() -> dict:
+    '''
+        Return the full character list as raw and gzip-compressed JSON bytes,
+        rebuilding them only when items has changed since the last call.
+
+        Returns:
+            dict: Cache entry with 'version', 'body' and 'gz' keys.
+    '''
+    global _cache
+
+    cache = _cache
+    if cache["version"] == _items_version:
+        return cache
+
+    # One rebuild at a time; requests queued here pick up the entry it installs
+    with _dump_lock:
+        with _items_lock:
+            cache = _cache
+            version = _items_version
+            if cache["version"] == version:
+                return cache
+
+            # Same envelope as a paginated response, as a single page holding every record
+            body = b'{"page":1,"limit":0,"total_pages":1,"total_records":%d,"data":%s}' % (
+                items.height, items.write_json().encode()
+            )
+
+        # Compress outside the items lock so other routes are not held up
+        cache = {"version": version, "body": body, "gz": gzip.compress(body, 1)}
+
+        # Swap in the whole entry at once, never replacing a newer one
+        if _cache["version"] < version:
+            _cache = cache
+        return _cache
+
+
+@lru_cache(maxsize=256)
+def _render_page(version: int, page: int, limit: int) -> bytes:
+    '''
+        Render one page of characters as JSON bytes.
+        Args:
+            version (int): Current items version, used only as part of the cache key.
+            page (int): Page number.
+            limit (int): Number of items per page.
+
+        Returns:
+            bytes: JSON body with pagination metadata.
+    '''
     # Calculate offset
     offset = (page - 1) * limit
 
@@ -87,18 +313,13 @@ def get_characters():
     # Paginate
     paginated_df = items.slice(offset, limit)
 
-    # Convert to list of dicts for JSON output
-    characters = paginated_df.to_dicts()
+    # Serialize rows directly in Polars instead of building Python dicts
+    characters = paginated_df.write_json()
 
     # Return with metadata
-    return jsonify({
-        "page": page,
-        "limit": limit,
-        "total_pages": total_pages,
-        "total_records": total_records,
-        "data": characters
-    })
-
+    return b'{"page":%d,"limit":%d,"total_pages":%d,"total_records":%d,"data":%s}' % (
+        page, limit, total_pages, total_records, characters.encode()
+    )
 
 
 # Get Specific Item
@@ -119,28 +340,99 @@ def get_character():
         last_name = request.args.get("last_name", "").strip().lower()
 
         if not first_name and not last_name:
-            return jsonify({"error": "Please provide at least 'first_name' or 'last_name'."}), 400
+            return app.json.response({"error": "Please provide at least 'first_name' or 'last_name'."}), 400
 
-        df = items
+        with _items_lock:
+            fn_idx, ln_idx = name_indices()
 
-        # Build OR conditions
-        conditions = []
-        if first_name:
-            conditions.append(pl.col("first_name").str.to_lowercase() == first_name)
-        if last_name:
-            conditions.append(pl.col("last_name").str.to_lowercase() == last_name)
+            # Collect matching rows from the name indices, kept in file order
+            rows = set()
+            if first_name:
+                rows.update(fn_idx.get(first_name, ()))
+            if last_name:
+                rows.update(ln_idx.get(last_name, ()))
 
-        # Combine conditions with OR
-        filtered = df.filter(reduce(operator.or_, conditions))
+            if not rows:
+                return app.json.response({"message": "No matching characters found"}), 404
 
-        if filtered.height == 0:
-            return jsonify({"message": "No matching characters found"}), 404
+            body = items[sorted(rows)].write_json()
 
-        return jsonify(filtered.to_dicts()), 200
+        return Response(body, mimetype="application/json"), 200
 
     except Exception as e:
         logging.exception("Error searching characters: %s", e)
-        return jsonify({"error": str(e)}), 500
+        return app.json.response({"error": str(e)}), 500
+
+
+# Get Item by ID
+@app.route("/characters/<int:item_id>", methods=["GET"])
+def get_character_by_id(item_id):
+    '''
+        Get a single character by ID.
+        Args:
+            item_id (int): ID of the character to retrieve.
+        Query Parameters:
+            fields (str, optional): Comma-separated columns to return (default all)
+        Returns:
+            JSON response with the character details or a not found message.
+    '''
+    with _items_lock:
+        idx = _id_index.get(item_id)
+        if idx is None:
+            return app.json.response({"message": "Item not found"}), 404
+
+        df = items
+
+        # Project to the requested columns before touching the row
+        fields = request.args.get("fields")
+        if fields:
+            # Strip whitespace and drop repeats while keeping the requested order
+            cols = [c for c in dict.fromkeys(f.strip() for f in fields.split(",")) if c in df.columns]
+            if not cols:
+                return app.json.response({"error": "No valid fields requested."}), 400
+            df = df.select(cols)
+
+        row = df.row(idx, named=True)
+
+    return app.json.response(row), 200
+
+
+def coerce_row(fields: dict, schema: pl.Schema) -> dict:
+    '''
+        Convert JSON values to their columns' dtypes in one cast, without losing information.
+        Args:
+            fields (dict): Column name to value, from the request body.
+            schema (pl.Schema): Schema of the target DataFrame.
+
+        Returns:
+            dict: The values converted to their columns' dtypes.
+
+        Raises:
+            ValueError: If a value is nested, has the wrong type, or would change when cast.
+    '''
+    for key, value in fields.items():
+        if isinstance(value, (dict, list)):
+            raise ValueError(f"Invalid value for '{key}': nested values are not supported")
+        # bool is an int subclass, so keep it out of numeric columns explicitly
+        if value is not None and isinstance(value, bool) != (schema[key] == pl.Boolean):
+            raise ValueError(f"Invalid value for '{key}': expected a value of type {schema[key]}")
+
+    # Cast the whole row against the table schema in a single pass
+    try:
+        row = (
+            pl.DataFrame([fields])
+            .cast({key: schema[key] for key in fields}, strict=True)
+            .row(0, named=True)
+        )
+    except (pl.exceptions.PolarsError, OverflowError):
+        expected = ", ".join(f"'{key}' ({schema[key]})" for key in fields)
+        raise ValueError(f"Invalid value: expected values of type {expected}") from None
+
+    # Reject lossy casts such as 3.7 -> 3 or 5 -> "5"
+    for key, value in fields.items():
+        if value is not None and row[key] != value:
+            raise ValueError(f"Invalid value for '{key}': expected a value of type {schema[key]}")
+    return row
 
 
 # Update existing Item
@@ -156,44 +448,54 @@ def update_character(item_id):
     """
     try:
         # Load the dataset
-        global items
-
-        # Ensure 'id' column is int for comparison
-        items = items.with_columns(pl.col("id").cast(pl.Int64))
+        global items, _items_version, _fn_idx, _ln_idx
 
         # Parse the incoming JSON data
         data = request.get_json()
         if not data:
-            return jsonify({"error": "No JSON data provided"}), 400
-
-        # Check if item exists
-        if item_id not in items["id"].to_list():
-            logging.error("Item with ID %d not found for update.", item_id)
-            return jsonify({"message": "Item not found"}), 404
-
-        update_exprs = []
-
-        for key, value in data.items():
-            if key in items.columns and key != "id":
-                expr = pl.when(pl.col("id") == item_id).then(pl.lit(value)).otherwise(pl.col(key)).alias(key)
-                update_exprs.append(expr)
-
-        if update_exprs:
-            items = items.with_columns(update_exprs)
-
-
-        # Save changes back to CSV
-        items.write_csv(CSV_PATH)
-
-        # Get updated row as dictionary
-        updated_row = items.filter(pl.col("id") == item_id).to_dicts()[0]
+            return app.json.response({"error": "No JSON data provided"}), 400
+
+        with _items_lock:
+            # Check if item exists
+            idx = _id_index.get(item_id)
+            if idx is None:
+                logging.error("Item with ID %d not found for update.", item_id)
+                return app.json.response({"message": "Item not found"}), 404
+
+            # Convert every value up front so a bad field cannot leave the row half-updated
+            fields = {key: value for key, value in data.items() if key in items.columns and key != "id"}
+            updates = {}
+            if fields:
+                try:
+                    updates = coerce_row(fields, items.schema)
+                except ValueError as e:
+                    return app.json.response({"error": str(e)}), 400
+
+            if updates:
+                # Scatter each value into the single matching cell instead of rewriting whole columns
+                for key, value in updates.items():
+                    items[idx, key] = value
+
+                # Drop stale name indices; the next search rebuilds them
+                if "first_name" in updates:
+                    _fn_idx = None
+                if "last_name" in updates:
+                    _ln_idx = None
+
+                _items_version += 1
+
+                # Schedule the changes to be saved back to CSV
+                _dirty.set()
+
+            # Get updated row as dictionary
+            updated_row = items.row(idx, named=True)
 
         logging.info("Item with ID %d updated successfully.", item_id)
-        return jsonify(updated_row), 200
+        return app.json.response(updated_row), 200
 
     except Exception as e:
         logging.exception("Error updating character: %s", e)
-        return jsonify({"error": str(e)}), 500
+        return app.json.response({"error": str(e)}), 500
 
 
 # Delete Existing Item
@@ -206,20 +508,31 @@ def delete_item(item_id):
         Returns:
             JSON response with a success or not found message.
     '''
-    global items
+    global items, _items_version, _id_index, _fn_idx, _ln_idx
+
+    with _items_lock:
+        idx = _id_index.get(item_id)
+        if idx is None:
+            logging.error("Item with ID %d not found for deletion.", item_id)
+            return app.json.response({"message": "Item not found"}), 404
+
+        # Remove the row by joining the slices around it rather than filtering every row
+        items = pl.concat([items.slice(0, idx), items.slice(idx + 1)], rechunk=False)
 
-    if item_id not in items["id"].to_list():
-        logging.error("Item with ID %d not found for deletion.", item_id)
-        return jsonify({"message": "Item not found"}), 404
+        # Chunks pile up with each delete and slow every later read, so compact occasionally
+        if items.n_chunks() > MAX_CHUNKS:
+            items = items.rechunk()
 
-    # Remove the row
-    items = items.filter(pl.col("id") != item_id)
+        # Shift the indices of every later row down by one
+        _id_index = {k: v - 1 if v > idx else v for k, v in _id_index.items() if k != item_id}
+        _fn_idx = _ln_idx = None
+        _items_version += 1
 
-    # Save updated DataFrame to CSV
-    items.write_csv(CSV_PATH)
+        # Schedule the updated DataFrame to be saved to CSV
+        _dirty.set()
 
     logging.info("Item with ID %d deleted successfully.", item_id)
-    return jsonify({"message": "Item deleted successfully."}), 200
+    return app.json.response({"message": "Item deleted successfully."}), 200
 
 
 if __name__ == "__main__":